@@ -1,14 +1,40 @@
 #!/usr/bin/env python
 
-from collections.abc import Sequence
 from dataclasses import dataclass
 
-from enum import IntEnum, unique
-from typing import Any, Dict, Iterable, List, Literal, Union, Tuple, Optional
+from functools import lru_cache, partial
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Union, Tuple, Optional
 
 
-@unique
-class Card(IntEnum):
+class _CardType(type):
+	"""
+	Just enough of the enum metaclass interface for Card (iteration, len, lookup by value or name)
+
+	Card used to be an IntEnum, but the enum metaclass defines __getattr__, which routes every single class attribute
+	lookup (i.e. every Card.X, which are all over the hot paths) through a slow Python-level hook
+	"""
+
+	def __iter__(cls) -> Iterator['Card']:
+		return iter(cls._members)
+
+	def __reversed__(cls) -> Iterator['Card']:
+		return reversed(cls._members)
+
+	def __len__(cls) -> int:
+		return len(cls._members)
+
+	def __getitem__(cls, name: str) -> 'Card':
+		return cls._members_by_name[name]
+
+	def __call__(cls, value: int) -> 'Card':
+		try:
+			return cls._members_by_value[value]
+		except KeyError:
+			raise ValueError(f'{value!r} is not a valid Card') from None
+
+
+class Card(int, metaclass=_CardType):
+	__slots__ = ()
 
 	Sashimi = 1
 	Tempura = 2
@@ -25,82 +51,167 @@ class Card(IntEnum):
 
 	Unknown = 99
 
+	@property
+	def name(self) -> str:
+		return _CARD_MEMBER_NAMES[self]
+
+	@property
+	def value(self) -> int:
+		return int(self)
+
+	def __repr__(self) -> str:
+		return f'<Card.{_CARD_MEMBER_NAMES[self]}: {int(self)}>'
+
+	# Cards are singletons, so make sure copying & unpickling preserve that
+
+	def __reduce__(self):
+		return (Card, (int(self),))
+
+	def __copy__(self) -> 'Card':
+		return self
+
+	def __deepcopy__(self, memo) -> 'Card':
+		return self
+
 	def __str__(self) -> str:
-		return {
-			Card.Unknown: '?',
-			Card.Tempura: 'Tempura',
-			Card.Sashimi: 'Sashimi',
-			Card.Dumpling: 'Dumpling',
-			Card.Maki1: 'Maki 1',
-			Card.Maki2: 'Maki 2',
-			Card.Maki3: 'Maki 3',
-			Card.EggNigiri: 'Egg Nigiri',
-			Card.SalmonNigiri: 'Salmon Nigiri',
-			Card.SquidNigiri: 'Squid Nigiri',
-			Card.Wasabi: 'Wasabi',
-			Card.Pudding: 'Pudding',
-			Card.Chopsticks: 'Chopsticks',
-		}[self]
+		return _CARD_NAMES[self]
 
 	def short_name(self) -> str:
-		return {
-			Card.Unknown: '???',
-			Card.Tempura: 'TEM',
-			Card.Sashimi: 'SAS',
-			Card.Dumpling: 'DUM',
-			Card.Maki1: 'MA1',
-			Card.Maki2: 'MA2',
-			Card.Maki3: 'MA3',
-			Card.EggNigiri: 'EGG',
-			Card.SalmonNigiri: 'SAL',
-			Card.SquidNigiri: 'SQU',
-			Card.Wasabi: 'WAS',
-			Card.Pudding: 'PUD',
-			Card.Chopsticks: 'CHO',
-		}[self]
+		return _CARD_SHORT_NAMES[self]
 
 	def is_maki(self) -> bool:
-		return self in [Card.Maki1, Card.Maki2, Card.Maki3]
+		return bool(_MAKI_MASK & (1 << self))
 
 	def is_nigiri(self) -> bool:
-		return self in [Card.EggNigiri, Card.SalmonNigiri, Card.SquidNigiri]
+		return bool(_NIGIRI_MASK & (1 << self))
 
 	def num_maki(self) -> Literal[0, 1, 2, 3]:
-		if self == Card.Maki1:
-			return 1
-		elif self == Card.Maki2:
-			return 2
-		elif self == Card.Maki3:
-			return 3
-		else:
-			return 0
+		return _NUM_MAKI[self]
 
 	def nigiri_base_points(self) -> Optional[Literal[1, 2, 3]]:
-		if self == Card.EggNigiri:
-			return 1
-		elif self == Card.SalmonNigiri:
-			return 2
-		elif self == Card.SquidNigiri:
-			return 3
-		else:
-			return None
+		return _NIGIRI_BASE_POINTS[self]
+
+
+def _init_card_members() -> None:
+	members = []
+	for name, value in list(vars(Card).items()):
+		if name.startswith('_') or type(value) is not int:
+			continue
+		member = int.__new__(Card, value)
+		type.__setattr__(Card, name, member)
+		members.append((name, member))
+
+	assert len(set(member for _, member in members)) == len(members), 'Card values must be unique'
+
+	Card._members = tuple(member for _, member in members)
+	Card._members_by_name = {name: member for name, member in members}
+	Card._members_by_value = {int(member): member for _, member in members}
+
+
+_init_card_members()
+
+
+# Lookup tables indexed by Card value, built once at import time instead of building a dict on every call
+
+def _make_card_table(values: Dict[Card, Any], default: Any = None) -> tuple:
+	table = [default] * (max(Card) + 1)
+	for card, value in values.items():
+		table[card] = value
+	return tuple(table)
+
+
+_CARD_MEMBER_NAMES = _make_card_table({card: name for name, card in Card._members_by_name.items()})
+
+_CARD_NAMES = _make_card_table({
+	Card.Unknown: '?',
+	Card.Tempura: 'Tempura',
+	Card.Sashimi: 'Sashimi',
+	Card.Dumpling: 'Dumpling',
+	Card.Maki1: 'Maki 1',
+	Card.Maki2: 'Maki 2',
+	Card.Maki3: 'Maki 3',
+	Card.EggNigiri: 'Egg Nigiri',
+	Card.SalmonNigiri: 'Salmon Nigiri',
+	Card.SquidNigiri: 'Squid Nigiri',
+	Card.Wasabi: 'Wasabi',
+	Card.Pudding: 'Pudding',
+	Card.Chopsticks: 'Chopsticks',
+})
+
+_CARD_SHORT_NAMES = _make_card_table({
+	Card.Unknown: '???',
+	Card.Tempura: 'TEM',
+	Card.Sashimi: 'SAS',
+	Card.Dumpling: 'DUM',
+	Card.Maki1: 'MA1',
+	Card.Maki2: 'MA2',
+	Card.Maki3: 'MA3',
+	Card.EggNigiri: 'EGG',
+	Card.SalmonNigiri: 'SAL',
+	Card.SquidNigiri: 'SQU',
+	Card.Wasabi: 'WAS',
+	Card.Pudding: 'PUD',
+	Card.Chopsticks: 'CHO',
+})
+
+
+_NUM_MAKI = _make_card_table({
+	Card.Maki1: 1,
+	Card.Maki2: 2,
+	Card.Maki3: 3,
+}, default=0)
+
+_NIGIRI_BASE_POINTS = _make_card_table({
+	Card.EggNigiri: 1,
+	Card.SalmonNigiri: 2,
+	Card.SquidNigiri: 3,
+})
+
+_MAKI_MASK = (1 << Card.Maki1) | (1 << Card.Maki2) | (1 << Card.Maki3)
+_NIGIRI_MASK = (1 << Card.EggNigiri) | (1 << Card.SalmonNigiri) | (1 << Card.SquidNigiri)
 
 
 def sort_cards(cards: Iterable[Card]) -> List[Card]:
-	return sorted(list(cards))
+	# Card values are already assigned in display order, so natural int ordering is the sort order - no key needed
+	return sorted(cards)
+
+
+# Card multisets packed into a single int, 5 bits per card type - cheap to hash & compare, e.g. as transposition keys
+# Card.Unknown is given the unused slot 0, so the packed value stays small
+_PACKED_COUNT_BITS = 5
+_PACKED_SHIFT = _make_card_table({card: _PACKED_COUNT_BITS * card for card in Card if card != Card.Unknown}, default=0)
+_PACKED_ONE = tuple(1 << shift for shift in _PACKED_SHIFT)
+
 
+def pack_cards(cards: Iterable[Card]) -> int:
+	"""
+	Pack a multiset of cards into an int; order doesn't matter, and counts must be < 32
+	"""
+	packed = 0
+	for card in cards:
+		packed += _PACKED_ONE[card]
+	return packed
 
-class Pick(Sequence[Card]):
-	__slots__ = ['_a', '_b']
+
+# Deliberately not a collections.abc.Sequence subclass - that only adds ABC overhead, and we implement what we need
+class Pick:
+	__slots__ = ['_a', '_b', '_pair', '_tuple', '_hash']
 
 	def __init__(self, a: Card, b: Optional[Card]=None, /):
-		if (b is not None) and not self._order_may_matter(a=a, b=b):
-			a, b = sorted((a, b))
 		assert isinstance(a, Card)
-		assert (b is None) or isinstance(b, Card)
+		if b is not None:
+			assert isinstance(b, Card)
+			# Normalize order, unless order may matter
+			if b < a and not _ORDER_MAY_MATTER_TABLE[a * _NUM_CARD_VALUES + b]:
+				a, b = b, a
 		self._a: Card = a
 		self._b: Optional[Card] = b
 
+		# Picks are immutable, so precompute these once rather than building tuples on every access
+		self._pair: Tuple[Card, Optional[Card]] = (a, b)
+		self._tuple: Union[Tuple[Card], Tuple[Card, Card]] = (a,) if b is None else self._pair
+		self._hash: int = hash(a) if b is None else hash(self._pair)
+
 	@property
 	def a(self) -> Card:
 		return self._a
@@ -110,13 +221,10 @@ class Pick(Sequence[Card]):
 		return self._b
 
 	def as_tuple(self) -> Union[Tuple[Card], Tuple[Card, Card]]:
-		if self._b is None:
-			return (self._a,)
-		else:
-			return (self._a, self._b)
+		return self._tuple
 
 	def as_pair(self) -> Tuple[Card, Optional[Card]]:
-		return (self._a, self._b)
+		return self._pair
 
 	def order_matters(self, num_unused_wasabi: int) -> bool:
 
@@ -127,13 +235,13 @@ class Pick(Sequence[Card]):
 		#   no unused wasabi: wasabi + nigiri
 		#   1 unused wasabi: 2 different nigiri
 
-		if (self._b is None) or (self._a == self._b):
+		if (self._b is None) or (self._a is self._b):
 			return False
 
 		a_nigiri = self._a.is_nigiri()
 		b_nigiri = self._b.is_nigiri()
-		a_wasabi = self._a == Card.Wasabi
-		b_wasabi = self._b == Card.Wasabi
+		a_wasabi = self._a is Card.Wasabi
+		b_wasabi = self._b is Card.Wasabi
 
 		if not num_unused_wasabi:
 			return (a_wasabi and b_nigiri) or (b_wasabi and a_nigiri)
@@ -144,38 +252,34 @@ class Pick(Sequence[Card]):
 
 	@staticmethod
 	def _order_may_matter(a: Card, b: Optional[Card]) -> bool:
-		if (b is None) or (a == b):
-			return False
-		a_nigiri = a.is_nigiri()
-		b_nigiri = b.is_nigiri()
-		a_wasabi = a == Card.Wasabi
-		b_wasabi = b == Card.Wasabi
-		return (a_nigiri and b_nigiri) or (a_wasabi and b_nigiri) or (b_wasabi and a_nigiri)
+		return (b is not None) and bool(_ORDER_MAY_MATTER_TABLE[a * _NUM_CARD_VALUES + b])
 
 	@property
 	def order_may_matter(self) -> bool:
 		return self._order_may_matter(a=self._a, b=self._b)
 
 	def __getitem__(self, idx: int) -> Optional[Card]:
-		return self.as_tuple()[idx]
+		return self._tuple[idx]
 
 	def __len__(self) -> Literal[1, 2]:
 		return 2 if (self._b is not None) else 1
 
+	def __iter__(self) -> Iterator[Card]:
+		return iter(self._tuple)
+
 	def __contains__(self, card: Card) -> bool:
-		return card in self.as_pair()
+		return card == self._a or card == self._b
 
 	def __eq__(self, other: Union['Pick', Card]) -> bool:
 		if isinstance(other, Card):
 			return (self._b is None) and (self._a == other)
+		elif isinstance(other, Pick):
+			return self._pair == other._pair
 		else:
-			return self.as_pair() == other.as_pair()
+			return NotImplemented
 
 	def __hash__(self) -> int:
-		if self._b is None:
-			return hash(self._a)
-		else:
-			return hash(self.as_pair())
+		return self._hash
 
 	def __str__(self) -> str:
 		if self._b is None:
@@ -191,8 +295,59 @@ class Pick(Sequence[Card]):
 		return f'Pick(a={self._a}, b={self._b}, order_may_matter={self.order_may_matter})'
 
 
-# TODO: python 3.10 slots=True
-@dataclass
+def _calc_order_may_matter(a: Card, b: Card) -> bool:
+	if a == b:
+		return False
+	a_nigiri = a.is_nigiri()
+	b_nigiri = b.is_nigiri()
+	a_wasabi = a == Card.Wasabi
+	b_wasabi = b == Card.Wasabi
+	return (a_nigiri and b_nigiri) or (a_wasabi and b_nigiri) or (b_wasabi and a_nigiri)
+
+
+# Truth table of Pick._order_may_matter for every (a, b) pair, indexed by a * _NUM_CARD_VALUES + b
+_NUM_CARD_VALUES = max(Card) + 1
+_ORDER_MAY_MATTER_TABLE = bytearray(_NUM_CARD_VALUES * _NUM_CARD_VALUES)
+for _a in Card:
+	for _b in Card:
+		_ORDER_MAY_MATTER_TABLE[_a * _NUM_CARD_VALUES + _b] = _calc_order_may_matter(_a, _b)
+
+
+# Interned picks - there are only a couple hundred possible, so build them all up front and share one instance each
+# Keyed by the cards as passed in (i.e. before normalizing order), so either order maps to the same instance
+_PICK_CACHE: Dict[Tuple[Card, Optional[Card]], Pick] = {}
+
+
+def _intern_all_picks() -> None:
+	for a in Card:
+		for b in (None, *Card):
+			pick = Pick(a, b)
+			_PICK_CACHE[(a, b)] = _PICK_CACHE.setdefault(pick.as_pair(), pick)
+
+
+_intern_all_picks()
+
+# Single-card picks are by far the most common, so these get a table indexed directly by card value
+_SINGLE_PICKS = _make_card_table({card: _PICK_CACHE[(card, None)] for card in Card})
+
+
+def get_pick(a: Card, b: Optional[Card]=None, /) -> Pick:
+	"""
+	Equivalent to Pick(a, b), but returns a shared instance
+	"""
+	try:
+		if b is None:
+			pick = _SINGLE_PICKS[a]
+			if pick is not None:
+				return pick
+		else:
+			return _PICK_CACHE[(a, b)]
+	except (KeyError, IndexError, TypeError):
+		pass
+	raise ValueError(f'Invalid pick: {a!r}, {b!r}')
+
+
+@dataclass(slots=True)
 class Plate:
 	score: int = 0
 	maki: int = 0
@@ -210,6 +365,18 @@ class Plate:
 	def num_tempura_needed(self) -> Literal[1, 2]:
 		return 1 if self.unscored_tempura else 2
 
+	def __copy__(self) -> 'Plate':
+		# Much faster than the generic reduce-based copy
+		return Plate(
+			self.score,
+			self.maki,
+			self.chopsticks,
+			self.unused_wasabi,
+			self.unscored_sashimi,
+			self.unscored_tempura,
+			self.dumplings,
+		)
+
 	def clear(self) -> None:
 		self.score = 0
 		self.maki = 0
@@ -223,6 +390,22 @@ class Plate:
 		# self.dumplings is excluded, since if this is nonzero, score would be nonzero too
 		return self.score or self.maki or self.chopsticks or self.unused_wasabi or self.unscored_sashimi or self.unscored_tempura
 
+	def pack(self) -> int:
+		"""
+		Pack the plate into a single int, e.g. for use in transposition table keys
+		Equal plates always pack to the same value, and vice versa
+		"""
+		# Score goes in the top bits since it's unbounded; the rest are small fixed-width fields
+		return (
+			self.dumplings |                  # 0-5: 3 bits
+			(self.unscored_tempura << 3) |    # bool: 1 bit
+			(self.unscored_sashimi << 4) |    # 0-2: 2 bits
+			(self.unused_wasabi << 6) |       # 6 bits
+			(self.chopsticks << 12) |         # 6 bits
+			(self.maki << 18) |               # 8 bits
+			(self.score << 26)
+		)
+
 	def __str__(self) -> str:
 		
 		vals = []
@@ -251,49 +434,52 @@ class Plate:
 		return '[' + ', '.join(vals) + ']'
 
 	def add(self, card: Card) -> None:
-		if card == Card.Chopsticks:
-			self.chopsticks += 1
-
-		elif card == Card.Wasabi:
-			self.unused_wasabi += 1
-
-		elif card == Card.Sashimi:
-			if self.unscored_sashimi == 2:
-				self.score += 10
-				self.unscored_sashimi = 0
-			else:
-				self.unscored_sashimi += 1
-
-		elif card == Card.Tempura:
-			if self.unscored_tempura:
-				self.score += 5
-			self.unscored_tempura = not self.unscored_tempura
-
-		elif card == Card.Dumpling:
-			assert 0 <= self.dumplings <= 5
-			if self.dumplings >= 5:
-				return
-			self.score += 1 + self.dumplings
-			self.dumplings += 1
-
-		elif card.is_nigiri():
-			points = card.nigiri_base_points()
-			assert points is not None
-			if self.unused_wasabi:
-				self.unused_wasabi -= 1
-				points *= 3
-			self.score += points
-
-		elif card.is_maki():
-			num_maki = card.num_maki()
-			assert num_maki
-			self.maki += num_maki
-
-		elif card == Card.Pudding:
-			pass  # Ignore puddings
+		try:
+			add_func = _PLATE_ADD_FUNCS[card]
+		except (IndexError, TypeError):
+			add_func = None
+		if add_func is None:
+			raise ValueError(f'Invalid card: {card}')
+		add_func(self)
 
+	# Per-card implementations of add(), dispatched through _PLATE_ADD_FUNCS
+
+	def _add_chopsticks(self) -> None:
+		self.chopsticks += 1
+
+	def _add_wasabi(self) -> None:
+		self.unused_wasabi += 1
+
+	def _add_sashimi(self) -> None:
+		if self.unscored_sashimi == 2:
+			self.score += 10
+			self.unscored_sashimi = 0
 		else:
-			raise ValueError(f'Invalid card: {card}')
+			self.unscored_sashimi += 1
+
+	def _add_tempura(self) -> None:
+		if self.unscored_tempura:
+			self.score += 5
+		self.unscored_tempura = not self.unscored_tempura
+
+	def _add_dumpling(self) -> None:
+		assert 0 <= self.dumplings <= 5
+		if self.dumplings >= 5:
+			return
+		self.score += 1 + self.dumplings
+		self.dumplings += 1
+
+	def _add_nigiri(self, points: int) -> None:
+		if self.unused_wasabi:
+			self.unused_wasabi -= 1
+			points *= 3
+		self.score += points
+
+	def _add_maki(self, num_maki: int) -> None:
+		self.maki += num_maki
+
+	def _add_pudding(self) -> None:
+		pass  # Ignore puddings
 
 	def play(self, pick: Pick) -> None:
 		if len(pick) == 2:
@@ -304,6 +490,23 @@ class Plate:
 			self.add(card)
 
 
+# Plate.add implementation for each card, indexed by card value (None for invalid cards)
+_PLATE_ADD_FUNCS = _make_card_table({
+	Card.Chopsticks: Plate._add_chopsticks,
+	Card.Wasabi: Plate._add_wasabi,
+	Card.Sashimi: Plate._add_sashimi,
+	Card.Tempura: Plate._add_tempura,
+	Card.Dumpling: Plate._add_dumpling,
+	Card.EggNigiri: partial(Plate._add_nigiri, points=Card.EggNigiri.nigiri_base_points()),
+	Card.SalmonNigiri: partial(Plate._add_nigiri, points=Card.SalmonNigiri.nigiri_base_points()),
+	Card.SquidNigiri: partial(Plate._add_nigiri, points=Card.SquidNigiri.nigiri_base_points()),
+	Card.Maki1: partial(Plate._add_maki, num_maki=Card.Maki1.num_maki()),
+	Card.Maki2: partial(Plate._add_maki, num_maki=Card.Maki2.num_maki()),
+	Card.Maki3: partial(Plate._add_maki, num_maki=Card.Maki3.num_maki()),
+	Card.Pudding: Plate._add_pudding,
+})
+
+
 def card_names(
 		cards: Union[Plate, Iterable[Union[Card, Tuple[Card, Card], Pick]]],
 		sort=False,
@@ -313,7 +516,20 @@ def card_names(
 	if isinstance(cards, Plate):
 		return str(cards)
 
-	if isinstance(cards, (set, frozenset)):
+	is_set = isinstance(cards, (set, frozenset))
+	cards = tuple(cards)
+
+	# Same hands & picks get printed over and over, so memoize the formatting
+	try:
+		hash(cards)
+	except TypeError:
+		return _card_names(cards, sort=sort, short=short, is_set=is_set)
+	return _card_names_cached(cards, sort=sort, short=short, is_set=is_set)
+
+
+def _card_names(cards: tuple, sort: bool, short: bool, is_set: bool) -> str:
+
+	if is_set:
 		start_chr = '{'
 		end_chr = '}'
 	else:
@@ -324,7 +540,7 @@ def card_names(
 		return start_chr + end_chr
 
 	# TODO: if sorted, count uniques - e.g. display "[2 Tempura]" instead of "[Tempura, Tempura]"
-	display_list = sorted(list(cards)) if sort else cards
+	display_list = sorted(cards) if sort else cards
 
 	if short:
 		display_list = [card.short_name() for card in display_list]
@@ -334,6 +550,9 @@ def card_names(
 	return start_chr + ", ".join(display_list) + end_chr
 
 
+_card_names_cached = lru_cache(maxsize=4096)(_card_names)
+
+
 def dict_card_names(cards: Dict[Card, Any], sort=True, short=False) -> str:
 
 	keys = cards.keys()
@@ -346,3 +565,25 @@ def dict_card_names(cards: Dict[Card, Any], sort=True, short=False) -> str:
 		dict_list = [f"{card}: {cards[card]}" for card in keys]
 
 	return "{" + ", ".join(dict_list) + "}"
+
+
+def _test():
+	# Code compares cards with "is", which relies on every Card being a singleton
+	import copy
+	import pickle
+	for card in Card:
+		assert Card(int(card)) is card
+		assert Card[card.name] is card
+		assert copy.copy(card) is card
+		assert copy.deepcopy(card) is card
+		assert pickle.loads(pickle.dumps(card)) is card
+
+	plate = Plate()
+	packed = {plate.pack()}
+	for card in [Card.Chopsticks, Card.Wasabi, Card.Sashimi, Card.Tempura, Card.Dumpling, Card.Maki3, Card.SquidNigiri]:
+		plate.add(card)
+		assert plate.pack() not in packed
+		packed.add(plate.pack())
+	assert copy.copy(plate).pack() == plate.pack()
+
+_test()
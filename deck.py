@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 
-from copy import copy
+from functools import lru_cache
+from itertools import chain, repeat
 import random
-from typing import List
+from typing import List, Optional, Tuple
 
 
 from cards import Card
@@ -26,23 +27,33 @@ _std_deck = {
 
 
 def get_deck_distribution():
-	return copy(_std_deck)
+	return dict(_std_deck)
+
+
+@lru_cache(maxsize=16)
+def _expand_distribution(distribution_items: Tuple[Tuple[Card, int], ...]) -> Tuple[Card, ...]:
+	# The distribution is the same for every game in a run, so only expand it once
+	return tuple(chain.from_iterable(repeat(card, count) for card, count in distribution_items))
 
 
 class Deck:
-	def __init__(self, distribution: dict):
-		self.deck = []
-		for card in distribution.keys():
-			self.deck += [card] * distribution[card]
-		random.shuffle(self.deck)
+	def __init__(self, distribution: dict, rng: Optional[random.Random] = None):
+		# Module-level RNG by default, so random.seed() still applies
+		self._rng = rng if rng is not None else random
+		self.deck = list(_expand_distribution(tuple(distribution.items())))
+		self._rng.shuffle(self.deck)
+		# Cards before this index have already been dealt
+		self._pos = 0
 
 	def deal_hand(self, num_cards: int) -> List[Card]:
 
-		if len(self.deck) < num_cards:
+		end = self._pos + num_cards
+
+		if end > len(self.deck):
 			raise OverflowError("Not enough cards in deck")
 
-		hand = self.deck[0:num_cards]
-		self.deck = self.deck[num_cards:]
+		hand = self.deck[self._pos:end]
+		self._pos = end
 		return hand
 
 	def deal_hands(self, num_players: int, num_cards_per_player: int) -> List[List[Card]]:
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
 from collections.abc import Sequence
+from functools import cache
+import math
 from typing import Tuple, List, Iterable, Optional
 
 
@@ -9,7 +11,10 @@ MIN_ELO = 100
 MIN_K = 2
 MAX_K = 32
 
+_LN10_OVER_400 = math.log(10.0) / 400.0
 
+
+@cache
 def k_factor(num_games: int) -> float:
 	k = 800 / max(num_games, 1)
 	k = min(k, float(MAX_K))
@@ -41,11 +46,9 @@ def elo(
 	if rb is None:
 		rb = DEFAULT_ELO
 
-	qa = 10.0 ** (ra / 400.0)
-	qb = 10.0 ** (rb / 400.0)
-
-	ea = qa / (qa + qb)
-	eb = qb / (qa + qb)
+	# Equivalent to qa / (qa + qb) where q = 10^(r/400), but with only 1 exp, and no overflow at extreme ratings
+	ea = 1.0 / (1.0 + math.exp((rb - ra) * _LN10_OVER_400))
+	eb = 1.0 - ea
 
 	da = k * (sa - ea)
 	db = k * (sb - eb)
@@ -84,27 +87,28 @@ def multiplayer_elo(
 		min_num_prev_matchups = min(num_prev_matchups)
 		k = k_factor(num_games=((num_players - 1) * (1 + min_num_prev_matchups)))
 
-	for player_idx, (player_rank, player_rating) in enumerate(zip(ranks, ratings)):
+	# Same as calling elo() for every pair, but only calculate each player's 10^(rating/400) once
+	qs = [10.0 ** (rating / 400.0) for rating in ratings]
+
+	for player_idx, (player_rank, player_rating, player_q) in enumerate(zip(ranks, ratings, qs)):
 
 		delta = 0
 
-		for opponent_idx, (opponent_rank, opponent_rating) in enumerate(zip(ranks, ratings)):
+		for opponent_idx, (opponent_rank, opponent_q) in enumerate(zip(ranks, qs)):
 			if opponent_idx == player_idx:
 				continue
 
-			prev_ratings = (player_rating, opponent_rating)
-
 			if player_rank > opponent_rank:
 				# Higher rank = player lost to opponent
-				scores = (0.0, 1.0)
+				score = 0.0
 			elif player_rank < opponent_rank:
 				# Lower rank = player beat opponent
-				scores = (1.0, 0.0)
+				score = 1.0
 			else:
 				# Draw
-				scores = (0.5, 0.5)
+				score = 0.5
 
-			delta += elo(scores=scores, prev_ratings=prev_ratings, k=k, delta=True)[0]
+			delta += k * (score - player_q / (player_q + opponent_q))
 
 		player_new_rating = max(player_rating + delta, float(MIN_ELO))
 		new_ratings.append(player_new_rating)
@@ -1,12 +1,11 @@
 #!/usr/bin/env python
 
-from collections import Counter, deque
 from collections.abc import Sequence
-from copy import copy, deepcopy
 from dataclasses import dataclass
-from typing import Callable, Iterable, List, Optional, Sequence, Union
+import random
+from typing import Iterable, Optional
 
-from cards import Card, Pick, card_names
+from cards import Card, Pick, card_names, get_pick
 from deck import Deck, get_deck_distribution
 from player import CommonGameState, PlayerInterface, PlayerState, init_round
 from present_value_based_ai import TunnelVisionAI
@@ -22,16 +21,17 @@ class PlayerResult:
 	num_puddings: int
 
 
+# Indexed by number of players (None = invalid number of players)
+_NUM_CARDS_PER_PLAYER = (None, None, 10, 9, 8, 7)
+
+_PASS_DIRECTION_STR = {True: 'forward', False: 'backward'}
+
+
 def get_num_cards_per_player(num_players: int) -> int:
-	try:
-		return {
-			2: 10,
-			3: 9,
-			4: 8,
-			5: 7
-		}[num_players]
-	except KeyError:
-		raise ValueError(f'Invalid number of players: {num_players}') from None
+	num_cards = _NUM_CARDS_PER_PLAYER[num_players] if 0 <= num_players < len(_NUM_CARDS_PER_PLAYER) else None
+	if num_cards is None:
+		raise ValueError(f'Invalid number of players: {num_players}')
+	return num_cards
 
 
 class Game:
@@ -45,13 +45,22 @@ class Game:
 			player_names: Optional[Iterable[str]] = None,
 			verbose: bool = False,
 			pause_after_turn: bool = False,
+			rng: Optional[random.Random] = None,
 			):
+		"""
+		:param rng: RNG for shuffling the deck; uses the module-level random by default
+		"""
 
 		self.verbose = verbose
 		self.pause_after_turn = pause_after_turn
 
 		self._num_players = len(players)
 		self._num_rounds = num_rounds
+		self._multi_round = num_rounds > 1
+
+		# Index of the player each player receives their next hand from
+		self._pass_forward_from_idx = [(idx - 1) % self._num_players for idx in range(self._num_players)]
+		self._pass_backward_from_idx = [(idx + 1) % self._num_players for idx in range(self._num_players)]
 
 		self._num_cards_per_player = num_cards_per_player or get_num_cards_per_player(self._num_players)
 
@@ -60,7 +69,7 @@ class Game:
 
 		self._print('Creating & shuffling deck')
 
-		self._deck = Deck(deck_dist)
+		self._deck = Deck(deck_dist, rng=rng)
 
 		if players is None:
 			self._print('Creating default AI')
@@ -75,8 +84,8 @@ class Game:
 		elif len(player_names) != self._num_players:
 			raise ValueError('Number of player names must match number of players')
 
+		# This also guarantees the names are unique (raises otherwise)
 		player_names = add_numbers_to_duplicate_names(player_names)
-		assert len(player_names) == len(set(player_names))
 
 		common_game_state = CommonGameState(
 			deck_count=sum(deck_dist.values()),
@@ -90,11 +99,20 @@ class Game:
 		)
 
 		self._print('Creating players')
-		self._player_states = [PlayerState(common_game_state=common_game_state, name=name) for name in player_names]
-		self._public_states_dict = {p.name: p.public_state for p in self._player_states}
+		self._player_states = []
+		self._public_states_dict = {}
+		for name in player_names:
+			state = PlayerState(common_game_state=common_game_state, name=name)
+			self._player_states.append(state)
+			self._public_states_dict[name] = state.public_state
+
+		assert len(self._player_states) == len(self._public_states_dict), "Player names should be guaranteed unique at this point"
 
-		assert len(self._player_states) == len(set([p.name for p in self._player_states])), "Player names should be guaranteed unique at this point"
+		# Built once, since _play_turn iterates over these pairs every turn (players never get reordered)
+		self._states_and_players = list(zip(self._player_states, self._players))
 
+	# Note: this is a no-op if not verbose, but arguments still get formatted - so call sites that do any formatting
+	# should check self.verbose themselves first
 	def _print(self, *args, **kwargs):
 		if self.verbose:
 			print(*args, **kwargs)
@@ -105,17 +123,25 @@ class Game:
 		input('Press enter to continue...')
 
 	def play(self) -> list[PlayerResult]:
-		self._print("Players: " + ", ".join([player.name for player in self._player_states]))
-		self._print()
+		if self.verbose:
+			self._print("Players: " + ", ".join([player.name for player in self._player_states]))
+			self._print()
+
+			self._print('Starting game')
+			self._print()
 
-		self._print('Starting game')
-		self._print()
+		# Loop invariants, hoisted out of the round & turn loops
+		verbose = self.verbose
+		multi_round = self._multi_round
+		num_rounds = self._num_rounds
+		num_cards_per_player = self._num_cards_per_player
+		pause = self.pause_after_turn
 
-		for round_idx in range(self._num_rounds):
+		for round_idx in range(num_rounds):
 			round_pass_forward = (round_idx % 2 == 0)
 
-			if self._num_rounds > 1:
-				self._print('\n\n\n==== Round %i/%i =====' % (round_idx+1, self._num_rounds))
+			if verbose and multi_round:
+				self._print('\n\n\n==== Round %i/%i =====' % (round_idx+1, num_rounds))
 
 			hands = self._deck.deal_hands(self._num_players, self._num_cards_per_player)
 
@@ -124,26 +150,30 @@ class Game:
 				hands=hands,
 				round_idx=round_idx,
 				round_pass_forward=round_pass_forward,
-				verbose=self.verbose,
+				verbose=verbose,
 			)
 
-			for turn_idx in range(self._num_cards_per_player):
-				if self._num_rounds > 1:
-					self._print('\n\n\n--- Round %i/%i, Turn %i/%i ---' % (round_idx + 1, self._num_rounds, turn_idx + 1, self._num_cards_per_player))
-				else:
-					self._print('\n\n\n--- Turn %i/%i ---' % (turn_idx + 1, self._num_cards_per_player))
-				self._print()
+			for turn_idx in range(num_cards_per_player):
+				if verbose:
+					if multi_round:
+						self._print('\n\n\n--- Round %i/%i, Turn %i/%i ---' % (round_idx + 1, num_rounds, turn_idx + 1, num_cards_per_player))
+					else:
+						self._print('\n\n\n--- Turn %i/%i ---' % (turn_idx + 1, num_cards_per_player))
+					self._print()
 				self._play_turn(pass_forward=round_pass_forward)
-				self._pause()
+				if pause:
+					self._pause()
 
-			scoring.score_round_players(self._player_states, print_it=self.verbose)
+			scoring.score_round_players(self._player_states, print_it=verbose)
 
-			self._print('Scores after round:')
-			for player in self._player_states:
-				self._print(f"\t{player.name + ':':24s} {player.total_score}, {player.num_pudding} pudding")
-			self._print()
+			if verbose:
+				self._print('Scores after round:')
+				for player in self._player_states:
+					self._print(f"\t{player.name + ':':24s} {player.total_score}, {player.num_pudding} pudding")
+				self._print()
 
-			self._pause()
+			if pause:
+				self._pause()
 
 		scoring.score_player_puddings(self._player_states, print_it=self.verbose)
 
@@ -160,44 +190,50 @@ class Game:
 
 	def _play_turn(self, pass_forward: bool):
 
+		game_verbose = self.verbose
+		player_states = self._player_states
 		picks = []
 
-		for n, (state, player) in enumerate(zip(self._player_states, self._players)):
+		for n, (state, player) in enumerate(self._states_and_players):
 
-			verbose = self.verbose and (n == 0)
+			verbose = game_verbose and (n == 0)
 
-			self._print(state.name)
-			pudding_str = (" (%i pudding)" % state.num_pudding) if state.num_pudding else ""
-			self._print("Plate: %s%s" % (card_names(state.plate, sort=True), pudding_str))
-			self._print("Hand: %s" % card_names(state.hand))
+			if game_verbose:
+				self._print(state.name)
+				pudding_str = (" (%i pudding)" % state.num_pudding) if state.num_pudding else ""
+				self._print("Plate: %s%s" % (card_names(state.plate, sort=True), pudding_str))
+				self._print("Hand: %s" % card_names(state.hand))
 
 			if verbose:
 				self._print("State:")
 				self._print(state.dump())
 
-			# deepcopy state to prevent player from accidentally "cheating" by modifying it
+			# Copy state to prevent player from accidentally "cheating" by modifying it
 			# TODO: if only 1 card, don't even bother with play_turn()
 			# TODO: dump full state if this or state.play_turn() throws an exception
-			pick = player.play_turn(deepcopy(state), verbose=verbose)
+			pick = player.play_turn(state.clone(), verbose=verbose)
 
-			self._print(f"Plays: {pick}")
+			if game_verbose:
+				self._print(f"Plays: {pick}")
 
 			if isinstance(pick, Card):
 				# TODO: log a warning
-				pick = Pick(pick)
+				pick = get_pick(pick)
 
 			if not isinstance(pick, Pick):
 				raise ValueError(f'AI played invalid: {pick!r}')
 
 			picks.append(pick)
 
-			self._print()
+			if game_verbose:
+				self._print()
 
-		for state, pick in zip(self._player_states, picks):
+		for state, pick in zip(player_states, picks):
 			state.play_turn(pick)
 
-		self._print('Passing cards %s' % ('forward' if pass_forward else 'backward'))
-		hands = deque(player.hand for player in self._player_states)
-		hands.rotate(1 if pass_forward else -1)
-		for hand, player in zip(hands, self._player_states):
+		if game_verbose:
+			self._print('Passing cards %s' % _PASS_DIRECTION_STR[pass_forward])
+		pass_from_idx = self._pass_forward_from_idx if pass_forward else self._pass_backward_from_idx
+		hands = [player_states[idx].hand for idx in pass_from_idx]
+		for hand, player in zip(hands, player_states):
 			player.pass_hands(hand)
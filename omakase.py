@@ -1,35 +1,34 @@
 #!/usr/bin/env python
 
 import argparse
+from array import array
 from collections import OrderedDict
-from collections.abc import Sequence
-import colorama
-from copy import copy
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass, field
-import itertools
+from functools import lru_cache
 from multiprocessing import Pool
+import os
 import random
-from typing import List, Optional
+from typing import Optional
 import warnings
 
-from tqdm import tqdm, trange
+from tqdm import tqdm
 
 from random_ai import RandomAI, RandomPlusAI, RandomPlusPlusAI
 from recursive_solver_ai import RecursiveSolverAI, LaterRecursiveAI
 from present_value_based_ai import HandOnlyAI, TunnelVisionAI, BasicPresentValueAI
 
 from cards import Card
-from deck import Deck, get_deck_distribution
+from deck import get_deck_distribution
 from elo import elo, multiplayer_elo, DEFAULT_ELO
 from game import Game, PlayerResult
-from player import get_player_name
 from utils import add_numbers_to_duplicate_names, ceil_divide, right_pad
 
 
-RESET_ALL = colorama.Style.RESET_ALL
-
 NEW_ELO_CALCULATION = True
 MULTIPROCESSING_MAX_CHUNK_SIZE = 32
+MULTIPROCESSING_CHUNKS_PER_PROCESS = 4
+PROCESS_RESULTS_MIN_GAMES_FOR_PROGRESS_BAR = 1000
 
 
 def _bool_arg(val) -> bool:
@@ -37,7 +36,7 @@ def _bool_arg(val) -> bool:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerMatchup:
 	num_games: int = 0
 	num_wins: int = 0
@@ -61,16 +60,17 @@ class PlayerMatchup:
 		return self.sum_rank / self.num_games if self.num_games else None
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerGameStats:
 	name: str
 	total_num_points: int = 0
 	margin_from_winner: int = 0
-	ranks: list[int] = field(default_factory=list)
-	normalized_ranks: Optional[list[int]] = field(default_factory=list)
+	# Compact arrays rather than lists, since there's 1 entry per game (ranks fit in a byte)
+	ranks: array = field(default_factory=lambda: array('B'))
+	normalized_ranks: Optional[array] = field(default_factory=lambda: array('d'))
 
 	elo: float = DEFAULT_ELO
-	num_elo_matchups_played = 0
+	num_elo_matchups_played: int = 0
 	elo_history: Optional[list[int]] = None
 
 	matchups: dict[str, PlayerMatchup] = field(default_factory=dict)
@@ -86,21 +86,25 @@ def play_game(*,
 		**game_kwargs,
 		) -> list[PlayerResult]:
 
-	random.seed(random_seed)
+	# Local RNG for everything this function & Game do, rather than depending on global state
+	rng = random.Random(random_seed)
+
+	# But the AIs still use the module-level RNG, so seed that too (from rng, so it's reproducible but not the same stream)
+	random.seed(rng.getrandbits(64))
 
 	assert (num_players == 0) or (2 <= num_players <= len(players))
 	if not num_players:
-		num_players = random.randint(2, min(5, len(players)))
+		num_players = rng.randint(2, min(5, len(players)))
 
 	idxs = list(range(len(players)))
 	if num_players < len(players):
 		# Randomly select players (and order) to play this game
-		idxs = random.sample(idxs, num_players)
+		idxs = rng.sample(idxs, num_players)
 		if not randomize_player_order:
 			idxs.sort()
 
 	elif randomize_player_order:
-		random.shuffle(idxs)
+		rng.shuffle(idxs)
 
 	assert len(idxs) == num_players
 	assert len(set(idxs)) == num_players, f"Not all idxs are unique: {idxs}"
@@ -122,17 +126,59 @@ def play_game(*,
 		player_names=player_names,
 		players=players,
 		verbose=verbose,
+		rng=rng,
 		**game_kwargs)
 	result = game.play()
 
 	return result
 
 
-def _play_game_from_kwargs(kwargs, /) -> list[PlayerResult]:
+# play_game kwargs for multiprocessing worker processes; sent once per worker by _init_worker(), rather than pickling
+# the full kwargs (including all the AI objects) with every single game
+_worker_play_game_kwargs: Optional[dict] = None
+
+# Player name -> index into player_names, so workers can send back names as small ints
+_worker_player_name_idxs: Optional[dict[str, int]] = None
+
+# (player name index, rank, score, num puddings) - PlayerResult, but much smaller to pickle
+CompactPlayerResult = tuple[int, int, int, int]
+
+
+def _init_worker(play_game_kwargs: dict, /) -> None:
+	"""
+	multiprocessing.Pool initializer
+	"""
+	global _worker_play_game_kwargs, _worker_player_name_idxs
+	_worker_play_game_kwargs = play_game_kwargs
+	_worker_player_name_idxs = {name: idx for idx, name in enumerate(play_game_kwargs['player_names'])}
+
+
+def _play_game_in_worker(random_seed: int, /) -> tuple[int, tuple[CompactPlayerResult, ...]]:
 	"""
-	Wrapper for play_game, for multiprocessing.Pool.imap purposes
+	Wrapper for play_game, for multiprocessing.Pool.imap_unordered purposes
+
+	:returns: (random_seed, result), so results can be put back in order afterwards; result is compact, to keep
+		IPC cheap - use _expand_compact_result() to turn it back into PlayerResults
 	"""
-	return play_game(**kwargs)
+	result = play_game(random_seed=random_seed, **_worker_play_game_kwargs)
+	name_idxs = _worker_player_name_idxs
+	return random_seed, tuple((name_idxs[r.name], r.rank, r.score, r.num_puddings) for r in result)
+
+
+def _expand_compact_result(compact_result: Iterable[CompactPlayerResult], player_names: Sequence[str]) -> list[PlayerResult]:
+	return [
+		PlayerResult(name=player_names[name_idx], rank=rank, score=score, num_puddings=num_puddings)
+		for name_idx, rank, score, num_puddings in compact_result
+	]
+
+
+def _get_num_processes() -> int:
+	# Respect CPU affinity (e.g. cgroup limits in containers), where supported; cpu_count() is the whole machine
+	try:
+		return len(os.sched_getaffinity(0))
+	except AttributeError:
+		# Not available on all platforms (e.g. Windows, macOS)
+		return os.cpu_count() or 1
 
 
 def _get_deck_distribution(args):
@@ -317,15 +363,25 @@ def _process_results(
 	# TODO: If there are multiple of the same AI, consolidate their stats
 
 	player_game_stats_dict = {
-		name: PlayerGameStats(name=name, normalized_ranks=([] if different_player_counts else None), elo_history=([] if include_elo_history else None))
+		name: PlayerGameStats(name=name, normalized_ranks=(array('d') if different_player_counts else None), elo_history=([] if include_elo_history else None))
 		for name in player_names
 	}
 
-	for game_result in tqdm(game_results, desc='Processing results'):
+	# Progress bar overhead isn't worth it when this is going to be near-instant anyway
+	disable_progress_bar = len(game_results) <= PROCESS_RESULTS_MIN_GAMES_FOR_PROGRESS_BAR
+
+	for game_result in tqdm(game_results, desc='Processing results', disable=disable_progress_bar):
 		num_players_this_game = len(game_result)
-		winning_score = max(r.score for r in game_result)
 
-		for player_game_result in game_result:
+		# Look these up once per game, rather than once per pair of players (and find the winning score in the same pass)
+		names_and_ranks = []
+		winning_score = None
+		for r in game_result:
+			names_and_ranks.append((r.name, r.rank))
+			if winning_score is None or r.score > winning_score:
+				winning_score = r.score
+
+		for my_idx, player_game_result in enumerate(game_result):
 
 			player_stats = player_game_stats_dict[player_game_result.name]
 			margin = player_game_result.score - winning_score
@@ -344,27 +400,24 @@ def _process_results(
 				assert 0 <= normalized_rank <= 1
 				player_stats.normalized_ranks.append(normalized_rank)
 
-			my_rank = player_game_result.rank
-
-			assert 1 <= my_rank <= num_players_this_game
+			rank_for_sum = normalized_rank if (normalized_rank is not None) else my_rank
+			matchups = player_stats.matchups
 
-			for other_player_result in game_result:
-				if other_player_result == player_game_result:
+			for other_idx, (other_name, other_rank) in enumerate(names_and_ranks):
+				if other_idx == my_idx:
 					continue
 
-				if other_player_result.name not in player_stats.matchups:
-					player_stats.matchups[other_player_result.name] = PlayerMatchup()
-
-				matchup = player_stats.matchups[other_player_result.name]
+				matchup = matchups.get(other_name)
+				if matchup is None:
+					matchup = matchups[other_name] = PlayerMatchup()
 
-				other_rank = other_player_result.rank
 				matchup.num_games += 1
 				if my_rank < other_rank:
 					matchup.num_wins += 1
 				elif my_rank == other_rank:
 					matchup.num_ties += 1
 
-				matchup.sum_rank += normalized_rank if (normalized_rank is not None) else my_rank
+				matchup.sum_rank += rank_for_sum
 
 	if NEW_ELO_CALCULATION:
 		_calculate_elo_new(player_game_stats_dict)
@@ -374,8 +427,35 @@ def _process_results(
 	return list(player_game_stats_dict.values())
 
 
+@lru_cache(maxsize=256)
+def _short_player_name(name: str) -> str:
+	name = name.replace('AI', '').replace('Ai', '').replace('Bot', '').replace('BOT', '')
+	name = ''.join([c for c in name if c.isalnum() and not c.islower()])
+	return f'{name:^5}'
+
+
+def _win_rate_color(colorama, win_rate: Optional[float]) -> str:
+	if win_rate is None:
+		return colorama.Style.RESET_ALL
+	assert 0.0 <= win_rate <= 1.0
+	if win_rate <= 0.2:
+		return colorama.Fore.RED
+	elif win_rate <= 0.4:
+		return colorama.Fore.YELLOW
+	elif win_rate <= 0.6:
+		return colorama.Style.RESET_ALL
+	elif win_rate <= 0.8:
+		return colorama.Fore.GREEN
+	else:
+		return colorama.Fore.BLUE
+
+
 def _print_results(player_game_stats: Sequence[PlayerGameStats], num_games: int, print_full_matchups=False) -> None:
 
+	# Imported here rather than at the top, so multiprocessing workers (which never print results) don't have to
+	import colorama
+	RESET_ALL = colorama.Style.RESET_ALL
+
 	assert all(bool(p.normalized_ranks) == bool(player_game_stats[0].normalized_ranks) for p in player_game_stats[1:])
 
 	player_game_stats = sorted(player_game_stats, key = lambda pgs: pgs.elo, reverse=True)
@@ -394,7 +474,7 @@ def _print_results(player_game_stats: Sequence[PlayerGameStats], num_games: int,
 	print(f'{"-"*name_len} | {"-"*10} | {"-"*8} | {"-"*9} | {"-"*10} | {"-"*4}')
 	for player in player_game_stats:
 		player_num_games = len(player.ranks)
-		num_wins = sum(rank == 1 for rank in player.ranks)
+		num_wins = player.ranks.count(1)
 		pct_wins = num_wins / player_num_games * 100.0
 		avg_rank = sum(player.normalized_ranks if player.normalized_ranks else player.ranks) / player_num_games
 		avg_score = player.total_num_points / player_num_games
@@ -405,18 +485,19 @@ def _print_results(player_game_stats: Sequence[PlayerGameStats], num_games: int,
 	print('Matchups:')
 	print()
 
-	def _short_player_name(name: str) -> str:
-		name = name.replace('AI', '').replace('Ai', '').replace('Bot', '').replace('BOT', '')
-		name = ''.join([c for c in name if c.isalnum() and not c.islower()])
-		return f'{name:^5}'
+	short_names = [_short_player_name(p.name) for p in player_game_stats]
 
-	print(f'{right_pad("Player", name_len)} | ' + ' | '.join(_short_player_name(p.name) for p in player_game_stats) + ' |')
+	print(f'{right_pad("Player", name_len)} | ' + ' | '.join(short_names) + ' |')
 	separator = f'{"-"*name_len} | ' + ' | '.join(['-'*5 for _ in range(num_players)]) + ' |'
 	print(separator)
+
+	# Every row has the same layout (name column, then 1 cell per player), so build the format string once
+	row_template = '%s | ' + ' | '.join(['%s'] * num_players) + ' |'
+	blank_name = ' ' * name_len
 	for player in player_game_stats:
 
 		matchups = [
-			(player.matchups[p.name] if p != player else None)
+			(player.matchups[p.name] if p is not player else None)
 			for p in player_game_stats
 		]
 
@@ -426,22 +507,7 @@ def _print_results(player_game_stats: Sequence[PlayerGameStats], num_games: int,
 		losses = [(m.num_losses if m is not None else None) for m in matchups]
 		ranks = [(m.avg_rank if m is not None else None) for m in matchups]
 
-		def _win_rate_color(win_rate: Optional[float]) -> str:
-			if win_rate is None:
-				return RESET_ALL
-			assert 0.0 <= win_rate <= 1.0
-			if win_rate <= 0.2:
-				return colorama.Fore.RED
-			elif win_rate <= 0.4:
-				return colorama.Fore.YELLOW
-			elif win_rate <= 0.6:
-				return colorama.Style.RESET_ALL
-			elif win_rate <= 0.8:
-				return colorama.Fore.GREEN
-			else:
-				return colorama.Fore.BLUE
-
-		colors = [_win_rate_color(r) for r in win_rates]
+		colors = [_win_rate_color(colorama, r) for r in win_rates]
 
 		def _fmt_val(val, pct) -> str:
 			if val is None:
@@ -454,14 +520,14 @@ def _print_results(player_game_stats: Sequence[PlayerGameStats], num_games: int,
 				return f'{val:5.2f}'
 
 		def _fmt_vals(vals, pct=False) -> list[str]:
-			return [color + _fmt_val(val, pct=pct) + RESET_ALL for color, val in zip(colors, vals)]
+			return [f'{color}{_fmt_val(val, pct=pct)}{RESET_ALL}' for color, val in zip(colors, vals)]
 
-		print(f'{right_pad(player.name, name_len)} | ' + ' | '.join(_fmt_vals(win_rates, pct=True)) + ' |')
+		print(row_template % (right_pad(player.name, name_len), *_fmt_vals(win_rates, pct=True)))
 		if print_full_matchups:
-			print(f'{" " * name_len} | ' + ' | '.join(_fmt_vals(wins)) + ' |')
-			print(f'{" " * name_len} | ' + ' | '.join(_fmt_vals(ties)) + ' |')
-			print(f'{" " * name_len} | ' + ' | '.join(_fmt_vals(losses)) + ' |')
-		print(f'{" " * name_len} | ' + ' | '.join(_fmt_vals(ranks)) + ' |')
+			print(row_template % (blank_name, *_fmt_vals(wins)))
+			print(row_template % (blank_name, *_fmt_vals(ties)))
+			print(row_template % (blank_name, *_fmt_vals(losses)))
+		print(row_template % (blank_name, *_fmt_vals(ranks)))
 		print(separator)
 
 
@@ -493,7 +559,7 @@ def parse_args() -> argparse.Namespace:
 
 	g = parser.add_argument_group('Basic game parameters')
 	g.add_argument('-p', '--players', default=None, dest='num_players', type=int, help='Number of players, or 0 for random per game. Default 4 if less than 100 games, 0 if >= 100')
-	g.add_argument('--seed', type=int, help='Deterministic random seed (currently only works for single-threaded)')
+	g.add_argument('--seed', type=int, help='Deterministic random seed')
 	g.add_argument('--short', action='store_true', help='Play very short game (1 round of 3 cards)')
 
 	g = parser.add_argument_group('Alternate game rules')
@@ -580,38 +646,44 @@ def main():
 		play_game(random_seed=args.seed, **play_game_kwargs)
 		return
 
-	use_multiprocessing = (not args.single_thread) and (args.num_games > 10) and (not args.pause_after_turn) and (args.seed is None)
+	use_multiprocessing = (not args.single_thread) and (args.num_games > 10) and (not args.pause_after_turn)
 
-	# TODO: support random seed with multiprocessing
-	if not use_multiprocessing:
-		if args.seed is None:
-			random.seed()
-			args.seed = random.randint(0, (2 ** 32) - 1 - args.num_games)
-			print(f'Random seed: {args.seed}')
-		else:
-			print(f'Using provided random seed: {args.seed}')
+	# Every game gets its own seed (args.seed + game_idx), so results are the same with or without multiprocessing
+	if args.seed is None:
+		random.seed()
+		args.seed = random.randint(0, (2 ** 32) - 1 - args.num_games)
+		print(f'Random seed: {args.seed}')
+	else:
+		print(f'Using provided random seed: {args.seed}')
+
+	game_seeds = range(args.seed, args.seed + args.num_games)
 
 	# TODO: return partial results if exiting early (need to use multiprocessing shared array for returns)
 
 	if use_multiprocessing:
-		with Pool() as p:
-			processes = p._processes  # TODO: is there a better way to get this without using private members?
-			chunksize = ceil_divide(args.num_games, processes)
+		processes = _get_num_processes()
+		with Pool(processes, initializer=_init_worker, initargs=(play_game_kwargs,)) as p:
+			# Several chunks per process, so the load still balances out if some games take longer than others
+			chunksize = ceil_divide(args.num_games, processes * MULTIPROCESSING_CHUNKS_PER_PROCESS)
 			assert chunksize >= 1
 			chunksize = min(chunksize, MULTIPROCESSING_MAX_CHUNK_SIZE)
-			game_results = list(tqdm(
-				p.imap(
-					_play_game_from_kwargs,
-					itertools.repeat(play_game_kwargs, args.num_games),
+			# Unordered so chunks are collected as soon as they're done, rather than waiting on the slowest earlier chunk
+			seeds_and_results = list(tqdm(
+				p.imap_unordered(
+					_play_game_in_worker,
+					game_seeds,
 					chunksize=chunksize,
 				),
 				total=args.num_games,
 				desc=f'Playing {args.num_games} games ({processes} processes, chunksize {chunksize})',
 			))
+		# But put them back in order, so results are exactly the same as single-threaded
+		seeds_and_results.sort(key=lambda seed_and_result: seed_and_result[0])
+		game_results = [_expand_compact_result(result, player_names) for _, result in seeds_and_results]
 	else:
 		game_results = [
-			play_game(random_seed=(args.seed + game_idx), **play_game_kwargs)
-			for game_idx in trange(args.num_games, desc=f'Playing {args.num_games} games')
+			play_game(random_seed=game_seed, **play_game_kwargs)
+			for game_seed in tqdm(game_seeds, desc=f'Playing {args.num_games} games')
 		]
 
 	player_game_stats = _process_results(game_results=game_results, player_names=player_names, include_elo_history=args.plot_elo)
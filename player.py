@@ -77,6 +77,15 @@ class PublicPlayerState:
 	total_score: int = 0
 	num_pudding: int = 0
 
+	def clone(self) -> 'PublicPlayerState':
+		return PublicPlayerState(
+			name=self.name,
+			plate=copy(self.plate),
+			play_history=list(self.play_history),
+			total_score=self.total_score,
+			num_pudding=self.num_pudding,
+		)
+
 
 class PlayerState:
 	def __init__(self, common_game_state: CommonGameState, name=''):
@@ -98,6 +107,22 @@ class PlayerState:
 		# Knowledge of hands (own and other players')
 		self.hands = deque()
 
+	def clone(self) -> 'PlayerState':
+		"""
+		Equivalent to deepcopy(self), but much faster
+
+		CommonGameState is shallow copied - its starting_deck_distribution is shared and must be treated as read-only
+		"""
+		ret = PlayerState.__new__(PlayerState)
+		ret.common_game_state = copy(self.common_game_state)
+		ret.public_states = [s.clone() for s in self.public_states]
+		ret.public_state = ret.public_states[0]
+		assert self.public_state is self.public_states[0]
+		ret.deck_dist = copy(self.deck_dist)
+		ret.num_unseen_dealt_cards = self.num_unseen_dealt_cards
+		ret.hands = deque(list(hand) for hand in self.hands)
+		return ret
+
 	@property
 	def hand(self) -> MutableSequence[Card]:
 		if not self.hands:
@@ -181,7 +206,7 @@ class PlayerState:
 		def remove(card: Card, num=1):
 			assert num > 0
 
-			if card == Card.Unknown:
+			if card is Card.Unknown:
 				return
 
 			if self.deck_dist[card] < num:
@@ -243,7 +268,7 @@ class PlayerState:
 		self.hand.remove(card)
 		self.plate.add(card)
 
-		if card == Card.Pudding:
+		if card is Card.Pudding:
 			self.public_state.num_pudding += 1
 
 	def end_round(self, round_score: int):
@@ -267,8 +292,7 @@ class PlayerState:
 
 		# public_states are shared, so we don't have to update those - game will do it
 		# But we do need to update our copy of hand
-		# TODO Python 3.10: strict=True
-		for state, hand in zip(self.other_player_states, self.other_player_hands):
+		for state, hand in zip(self.other_player_states, self.other_player_hands, strict=True):
 
 			last_play = state.play_history[-1]
 
@@ -294,15 +318,20 @@ class PlayerState:
 
 		assert len(new_hand) == len(old_hand)
 
-		hand_before_seeing = Counter(old_hand)
-		hand_after_seeing = Counter(new_hand)
-
-		if Card.Unknown in hand_before_seeing:
-			hand_before_seeing.pop(Card.Unknown)
-			newly_seen_cards = hand_after_seeing - hand_before_seeing
-			assert Card.Unknown not in newly_seen_cards
+		if Card.Unknown in old_hand:
+			hand_before_seeing = card_histogram(old_hand)
+			hand_after_seeing = card_histogram(new_hand)
+			assert not hand_after_seeing[Card.Unknown]
+			newly_seen_cards = Counter({
+				card: hand_after_seeing[card] - hand_before_seeing[card]
+				for card in Card
+				if card != Card.Unknown and hand_after_seeing[card] > hand_before_seeing[card]
+			})
 			self.update_deck_dist(newly_seen_cards)
-		elif hand_before_seeing != hand_after_seeing:
+
+		# Common case: we already knew everything in this hand, so just check it matches
+		# (Sorting is cheaper than counting for hands this small)
+		elif sorted(old_hand) != sorted(new_hand):
 			raise AssertionError(f"Received hand that doesn't match expected (expected: {card_names(old_hand)}, received: {card_names(new_hand)})")
 
 	def pass_hands(self, new_hand: Sequence[Card]):
@@ -338,8 +367,7 @@ class PlayerState:
 
 		if self.other_player_states:
 			s += '  other_player_states=[\n'
-			# TODO Python 3.10: strict=True
-			for state, hand in zip(self.other_player_states, self.other_player_hands):
+			for state, hand in zip(self.other_player_states, self.other_player_hands, strict=True):
 				assert state is not None
 				s += "    %s: plate %s, hand %s, pudding %i, score %i,\n" % (
 					state.name,
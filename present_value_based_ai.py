@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 from collections.abc import Collection, Sequence
-from copy import copy, deepcopy
+from copy import copy
 from dataclasses import dataclass
 from numbers import Real
 from typing import Optional, Tuple, Union
@@ -9,7 +9,7 @@ import warnings
 
 from player import PlayerInterface, PlayerState
 from probablistic_scoring import ProbablisticScorer, num_cards_odds_at_least
-from cards import Card, Pick, Plate, card_names
+from cards import Card, Pick, Plate, card_names, get_pick
 from utils import *
 import random
 
@@ -798,7 +798,7 @@ def _pair_avg_points(
 
 	if player_state is not None:
 
-		player_state = deepcopy(player_state)
+		player_state = player_state.clone()
 
 		player_state.hand.remove(card1)
 		player_state.hand.append(Card.Chopsticks)
@@ -966,7 +966,7 @@ def present_value_play_turn(*,
 	assert n_cards > 0
 
 	if n_cards == 1:
-		return Pick(hand[0])
+		return get_pick(hand[0])
 
 	if plate is not None:
 		num_chopsticks = plate.chopsticks
@@ -982,7 +982,7 @@ def present_value_play_turn(*,
 	# TODO: could make this slightly more efficient by eliminating some obvious picks (don't take lower nigiri or Maki)
 	# Should just use utils.get_all_picks(), it has this logic built in
 	cards_points = {
-		Pick(card): _card_avg_points(
+		get_pick(card): _card_avg_points(
 			card,
 			player_state=player_state,
 			probablistic_scorer=probablistic_scorer,
@@ -1,16 +1,21 @@
 #!/usr/bin/env python
 
-from collections import Counter
 from collections.abc import Collection, Sequence
 from enum import IntEnum, unique
 import random
 from typing import Union, Tuple
 
 from player import PlayerInterface, PlayerState
-from cards import Card, Pick, Plate, card_names
+from cards import Card, Pick, Plate, card_names, get_pick
 from utils import *
 
 
+# Bound methods of the module-level RNG, to skip the attribute lookups in the hot path
+# (Aliased rather than using a separate random.Random instance, so random.seed() still makes games reproducible)
+_choice = random.choice
+_sample = random.sample
+
+
 class RandomAI(PlayerInterface):
 	def __init__(self, weight_by_unique_cards=False):
 		"""
@@ -37,20 +42,20 @@ class RandomAI(PlayerInterface):
 
 		if use_chopsticks:
 			if self.weight_by_unique_cards:
-				card1 = random.choice(list(set(hand)))
+				card1 = _choice(tuple(set(hand)))
 				hand_copy = list(hand)
 				hand_copy.remove(card1)
-				card2 = random.choice(list(set(hand_copy)))
-				return Pick(card1, card2)
+				card2 = _choice(tuple(set(hand_copy)))
+				return get_pick(card1, card2)
 			else:
-				ret = random.sample(hand, 2)
+				ret = _sample(hand, 2)
 				assert len(ret) == 2
-				return Pick(ret[0], ret[1])
+				return get_pick(ret[0], ret[1])
 		else:
 			if self.weight_by_unique_cards:
-				return Pick(random.choice(list(set(hand))))
+				return get_pick(_choice(tuple(set(hand))))
 			else:
-				return Pick(random.choice(hand))
+				return get_pick(_choice(hand))
 
 
 @unique
@@ -58,7 +63,34 @@ class _RandomPickState(IntEnum):
 	great = 1
 	fine = 0
 	useless_to_me = -1
-	useless_to_anyone = -2
+
+
+# Cards as bits of an int, so the pick filtering below is plain integer ops instead of set operations
+_CARD_BIT = [0] * (max(Card) + 1)
+for _card in Card:
+	_CARD_BIT[_card] = 1 << _card
+_CARD_BIT = tuple(_CARD_BIT)
+
+_ALL_CARDS = tuple(sorted(Card))
+
+# Bound once here, so the checks in the hot path skip a _CARD_BIT lookup each
+_SASHIMI_BIT = _CARD_BIT[Card.Sashimi]
+_TEMPURA_BIT = _CARD_BIT[Card.Tempura]
+_DUMPLING_BIT = _CARD_BIT[Card.Dumpling]
+_SQUID_NIGIRI_BIT = _CARD_BIT[Card.SquidNigiri]
+_CHOPSTICKS_BIT = _CARD_BIT[Card.Chopsticks]
+
+# (bit of card, mask of cards it makes strictly redundant)
+_DOMINATED = (
+	(_CARD_BIT[Card.Maki3], _CARD_BIT[Card.Maki2] | _CARD_BIT[Card.Maki1]),
+	(_CARD_BIT[Card.Maki2], _CARD_BIT[Card.Maki1]),
+	(_CARD_BIT[Card.SquidNigiri], _CARD_BIT[Card.SalmonNigiri] | _CARD_BIT[Card.EggNigiri]),
+	(_CARD_BIT[Card.SalmonNigiri], _CARD_BIT[Card.EggNigiri]),
+)
+
+
+def _cards_in_mask(mask: int) -> list[Card]:
+	return [card for card in _ALL_CARDS if mask & _CARD_BIT[card]]
 
 
 def _random_plus_pick_card(
@@ -71,25 +103,29 @@ def _random_plus_pick_card(
 	n_cards = len(hand)
 	assert n_cards > 0
 
-	hand_maybes = set(hand)
-	fallbacks = set(hand)  # Cards that aren't useful to us, but could at least block someone else
+	hand_mask = 0
+	for card in hand:
+		hand_mask |= _CARD_BIT[card]
+
+	# Every card in hand can at least block someone else, so fallbacks are simply the whole hand
+	maybes = hand_mask
 
 	# Handle certain great combos we should always grab if we can
 
 	if take_obvious_picks:
-		if plate.num_sashimi_needed == 1 and Card.Sashimi in hand_maybes:
+		if plate.num_sashimi_needed == 1 and (maybes & _SASHIMI_BIT):
 			return Card.Sashimi, _RandomPickState.great  # 10 points
 
-		if plate.unused_wasabi and Card.SquidNigiri in hand_maybes:
+		if plate.unused_wasabi and (maybes & _SQUID_NIGIRI_BIT):
 			return Card.SquidNigiri, _RandomPickState.great  # 9 points
 
-		if plate.dumplings == 4 and Card.Dumpling in hand_maybes:
+		if plate.dumplings == 4 and (maybes & _DUMPLING_BIT):
 			return Card.Dumpling, _RandomPickState.great  # 6 points
 
-		# if plate.unused_wasabi and Card.SalmonNigiri in hand_maybes:
+		# if plate.unused_wasabi and (maybes & _CARD_BIT[Card.SalmonNigiri]):
 		# 	return Card.SalmonNigiri, _RandomPickState.great  # 6 points
 
-		# if plate.num_tempura_needed == 1 and Card.Tempura in hand_maybes:
+		# if plate.num_tempura_needed == 1 and (maybes & _TEMPURA_BIT):
 		# 	return Card.Tempura, _RandomPickState.great  # 5 points
 
 	# Chopsticks: don't take if can't use
@@ -97,62 +133,46 @@ def _random_plus_pick_card(
 	# but also covers n_cards <= 3, plate.chopsticks == 1
 
 	if n_cards <= 2 + plate.chopsticks:
-		hand_maybes.discard(Card.Chopsticks)
+		maybes &= ~_CHOPSTICKS_BIT
 
-	# Maki: don't take lower value
+	# Maki & nigiri: don't take lower value
 
-	if Card.Maki3 in hand_maybes:
-		hand_maybes.discard(Card.Maki2)
-		hand_maybes.discard(Card.Maki1)
-	elif Card.Maki2 in hand_maybes:
-		hand_maybes.discard(Card.Maki1)
+	dominated = 0
+	for card_bit, dominated_by_card in _DOMINATED:
+		if maybes & card_bit:
+			dominated |= dominated_by_card
+	maybes &= ~dominated
 
 	# Wasabi: don't take more wasabi than turns left
 	# TODO
 
-	# Nigiri: don't take lower value
-
-	if Card.SquidNigiri in hand_maybes:
-		hand_maybes.discard(Card.SalmonNigiri)
-		hand_maybes.discard(Card.EggNigiri)
-	elif Card.SalmonNigiri in hand_maybes:
-		hand_maybes.discard(Card.EggNigiri)
-
 	# Sashimi: don't take if impossible to complete set (based only on number of cards left)
 
-	if plate.num_sashimi_needed > n_cards and Card.Sashimi in hand_maybes:
-		hand_maybes.discard(Card.Sashimi)
-		fallbacks.add(Card.Sashimi)
+	if plate.num_sashimi_needed > n_cards:
+		maybes &= ~_SASHIMI_BIT
 
 	# Tempura: don't take if impossible to complete set (based only on number of cards left)
 
-	if plate.num_tempura_needed > n_cards and Card.Tempura in hand_maybes:
-		hand_maybes.discard(Card.Tempura)
-		fallbacks.add(Card.Tempura)
+	if plate.num_tempura_needed > n_cards:
+		maybes &= ~_TEMPURA_BIT
 
 	# Dumplings: don't take if already maxed
 
-	if plate.dumplings >= 5 and Card.Dumpling in hand_maybes:
-		hand_maybes.discard(Card.Dumpling)
-		fallbacks.add(Card.Dumpling)
+	if plate.dumplings >= 5:
+		maybes &= ~_DUMPLING_BIT
 
 	# Pick a card at random from the ones that are left
 
-	if hand_maybes:
-		hand_maybes = list(hand_maybes)
+	if maybes:
+		hand_maybes = _cards_in_mask(maybes)
 		if verbose:
 			print('Selecting randomly from: %s' % card_names(hand_maybes))
-		return random.choice(hand_maybes), _RandomPickState.fine
-	elif fallbacks:
-		fallbacks = list(fallbacks)
-		if verbose:
-			print('No good options, selecting randomly from cards that could at least block someone: %s' % card_names(fallbacks))
-		return random.choice(fallbacks), _RandomPickState.useless_to_me
+		return _choice(hand_maybes), _RandomPickState.fine
 	else:
-		# womp womp
+		fallbacks = _cards_in_mask(hand_mask)
 		if verbose:
-			print('No good options nor blocking cards, selecting at random')
-		return random.choice(hand), _RandomPickState.useless_to_anyone
+			print('No good options, selecting randomly from cards that could at least block someone: %s' % card_names(fallbacks))
+		return _choice(fallbacks), _RandomPickState.useless_to_me
 
 
 def _random_plus_pick_cards(
@@ -164,7 +184,7 @@ def _random_plus_pick_cards(
 	hand = player_state.hand
 
 	if len(hand) == 1:
-		return Pick(hand[0])
+		return get_pick(hand[0])
 
 	plate = player_state.plate
 
@@ -175,16 +195,17 @@ def _random_plus_pick_cards(
 
 	# First, handle certain obvious picks for pairs of cards, which the individual card picks would miss
 	if take_obvious_picks and can_use_chopsticks:
-		hand_count = Counter(hand)
+		# Count once up front, so each check below is a lookup instead of a scan over the hand
+		hand_count = card_histogram(hand)
 
-		if Card.Sashimi in hand_count and hand_count[Card.Sashimi] >= 2 and plate.num_sashimi_needed == 2:
-			return Pick(Card.Sashimi, Card.Sashimi)  # 10 points
+		if hand_count[Card.Sashimi] >= 2 and plate.num_sashimi_needed == 2:
+			return get_pick(Card.Sashimi, Card.Sashimi)  # 10 points
 
-		if Card.Wasabi in hand and Card.SquidNigiri in hand and not plate.unused_wasabi:
-			return Pick(Card.Wasabi, Card.SquidNigiri)  # 9 points
+		if hand_count[Card.Wasabi] and hand_count[Card.SquidNigiri] and not plate.unused_wasabi:
+			return get_pick(Card.Wasabi, Card.SquidNigiri)  # 9 points
 
-		if Card.Dumpling in hand_count and hand_count[Card.Dumpling] >= 2 and plate.dumplings == 3:
-			return Pick(Card.Dumpling, Card.Dumpling)  # 9 points
+		if hand_count[Card.Dumpling] >= 2 and plate.dumplings == 3:
+			return get_pick(Card.Dumpling, Card.Dumpling)  # 9 points
 		
 		# TOOD: wasabi-salmon? 2 tempura? 2 sashimi when num_sashimi_needed == 3?
 
@@ -194,8 +215,8 @@ def _random_plus_pick_cards(
 		plate=plate, hand=hand, verbose=verbose, take_obvious_picks=take_obvious_picks)
 
 	# TODO: this blocks rare case of using chopsticks to take 2 chopsticks
-	if (card1 == Card.Chopsticks):
-		return Pick(card1)
+	if card1 is Card.Chopsticks:
+		return get_pick(card1)
 
 	if can_use_chopsticks:
 
@@ -210,19 +231,19 @@ def _random_plus_pick_cards(
 		card2, card2_state = _random_plus_pick_card(
 			plate=plate_after, hand=hand_after, verbose=verbose, take_obvious_picks=take_obvious_picks)
 
-		if card2 == Card.Chopsticks:
-			return Pick(card1)
+		if card2 is Card.Chopsticks:
+			return get_pick(card1)
 
 		elif card2_state == _RandomPickState.great:
-			return Pick(card1, card2)
+			return get_pick(card1, card2)
 		
 		elif card2_state == _RandomPickState.fine and (should_use_chopsticks or random_bool()):
-			return Pick(card1, card2)
+			return get_pick(card1, card2)
 
 		elif card2_state == _RandomPickState.useless_to_me and should_use_chopsticks:
-			return Pick(card1, card2)
+			return get_pick(card1, card2)
 
-	return Pick(card1)
+	return get_pick(card1)
 
 
 
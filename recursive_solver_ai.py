@@ -2,7 +2,7 @@
 
 from collections import deque
 from collections.abc import Collection, Sequence
-from copy import copy, deepcopy
+from copy import copy
 from dataclasses import dataclass, field
 from enum import IntEnum, unique
 import itertools
@@ -10,7 +10,7 @@ from math import copysign, factorial, sqrt
 from numbers import Real
 from typing import List, Literal, Optional, Tuple, Union
 
-from cards import Card, Pick, Plate, card_names
+from cards import Card, Pick, Plate, card_names, get_pick, pack_cards
 from player import PlayerInterface, PlayerState
 from probablistic_scoring import ProbablisticScorer
 import scoring
@@ -92,8 +92,7 @@ TODO: true minimax (calculate optimal move for other players)
 ConsolidationType = Literal['best', 'worst', 'average']
 
 
-# TODO: slots=True (Python >= 3.10)
-@dataclass
+@dataclass(slots=True)
 class ConsolidatedResults:
 	best: Result
 	average: Result
@@ -135,8 +134,7 @@ class ConsolidatedResults:
 """
 PlayerState is pretty heavyweight, this is a lighter subset of info for use with large recursive trees
 """
-# TODO: slots=True (Python >= 3.10)
-@dataclass
+@dataclass(slots=True)
 class _MinimalPlayerState:
 	total_scores: list[int]
 	num_puddings: list[int]
@@ -169,12 +167,30 @@ class _MinimalPlayerState:
 			hands=hands,
 		)
 
+	def transposition_key(self) -> tuple:
+		"""
+		Key that's equal for any 2 states that will play out the same from here, regardless of the order cards were
+		played in to get here (and the order of cards within each hand)
+
+		total_scores aren't included, since they can't change within a round
+		"""
+		return (
+			tuple(pack_cards(hand) for hand in self.hands),
+			tuple(plate.pack() for plate in self.plates),
+			tuple(self.num_puddings),
+		)
+
 	def copy_with_played_cards(self, *picks) -> '_MinimalPlayerState':
 
 		if len(picks) != len(self.hands):
 			raise ValueError(f'Invalid length: {len(picks)} != {len(self.hands)}')
 
-		ret = deepcopy(self)
+		# Much faster than deepcopy, which matters since this gets called for every node in the tree
+		ret = _MinimalPlayerState.__new__(_MinimalPlayerState)
+		ret.total_scores = list(self.total_scores)
+		ret.num_puddings = list(self.num_puddings)
+		ret.plates = [copy(plate) for plate in self.plates]
+		ret.hands = deque(deque(hand) for hand in self.hands)
 
 		for idx, (pick, plate, hand) in enumerate(zip(picks, ret.plates, ret.hands)):
 			for card in pick:
@@ -263,10 +279,57 @@ def _solve_recursive(
 		prune_my_bad_picks=True,
 		prune_others_bad_picks=True,
 		verbose=Verbosity.silent,
+		transposition_table: Optional[dict] = None,
 		) -> Tuple[Pick, Optional[Result]]:
+	"""
+	:param transposition_table:
+		Cache of results for states already solved, keyed by _MinimalPlayerState.transposition_key()
+		Only valid within a single top-level solve, since the other parameters are assumed constant
+	"""
 
 	assert recursion_depth < 10, "This recursion depth should not be possible - something went wrong!"
 
+	need_result = (recursion_depth != 0)
+
+	# Different orders of picks often reach the same state - if we've already solved it, don't redo the whole subtree
+	# (Skipped when verbose, since the point is to see the printouts from the full tree)
+	transposition_key = None
+	if need_result and transposition_table is not None and not verbose:
+		transposition_key = player_state.transposition_key()
+		cached = transposition_table.get(transposition_key)
+		if cached is not None:
+			return cached
+
+	pick_and_result = _solve_recursive_uncached(
+		player_state=player_state,
+		last_round=last_round,
+		probablistic_scorer=probablistic_scorer,
+		consolidation_type=consolidation_type,
+		recursion_depth=recursion_depth,
+		prune_my_bad_picks=prune_my_bad_picks,
+		prune_others_bad_picks=prune_others_bad_picks,
+		verbose=verbose,
+		transposition_table=transposition_table,
+	)
+
+	if transposition_key is not None:
+		transposition_table[transposition_key] = pick_and_result
+
+	return pick_and_result
+
+
+def _solve_recursive_uncached(
+		player_state: _MinimalPlayerState,
+		last_round: bool,
+		probablistic_scorer: ProbablisticScorer,
+		consolidation_type: ConsolidationType,
+		recursion_depth: int,
+		prune_my_bad_picks: bool,
+		prune_others_bad_picks: bool,
+		verbose: Verbosity,
+		transposition_table: Optional[dict],
+		) -> Tuple[Pick, Optional[Result]]:
+
 	indent = '    ' * (1 + recursion_depth) if verbose else ''
 
 	extra_verbose = verbose >= Verbosity.extra_verbose
@@ -283,7 +346,7 @@ def _solve_recursive(
 	num_cards = len(hand)
 
 	if num_cards == 1:
-		pick = Pick(hand[0])
+		pick = get_pick(hand[0])
 		result = player_state.play_last_cards_and_score(probablistic_scorer=probablistic_scorer, verbose=extra_verbose_recursive, indent=indent)
 		return pick, result
 
@@ -347,6 +410,7 @@ def _solve_recursive(
 				prune_my_bad_picks=prune_my_bad_picks,
 				prune_others_bad_picks=prune_others_bad_picks,
 				verbose = (verbose if extra_verbose_recursive else Verbosity.silent),
+				transposition_table=transposition_table,
 			)
 
 			if extra_verbose:
@@ -422,10 +486,10 @@ def solve_recursive(
 
 	num_cards = len(hand)
 	if num_cards == 1:
-		return Pick(hand[0])
+		return get_pick(hand[0])
 
 	if (not player_state.plate.chopsticks) and len(set(hand)) == 1:
-		return Pick(hand[0])
+		return get_pick(hand[0])
 
 	num_players = 1 + len(player_state.other_player_states)
 
@@ -501,6 +565,7 @@ def solve_recursive(
 		prune_my_bad_picks=prune_my_bad_picks,
 		prune_others_bad_picks=prune_others_bad_picks,
 		verbose=verbosity,
+		transposition_table=dict(),
 	)
 	assert isinstance(pick, Pick)
 	return pick
@@ -27,13 +27,17 @@ def count_maki(plate: Sequence[Card]) -> int:
 	return num_maki
 
 
+# Score for number of dumplings (5+ all score the same)
+_DUMPLING_SCORES = (0, 1, 3, 6, 10, 15)
+
+
 def score_dumplings(plate: Sequence[Card]) -> int:
 	
 	num_dumpling = count_card(plate, Card.Dumpling)
 	
 	num_dumpling = min(num_dumpling, 5)
 	
-	return [0, 1, 3, 6, 10, 15][num_dumpling]
+	return _DUMPLING_SCORES[num_dumpling]
 
 
 def score_nigiri(plate: Sequence[Card]) -> int:
@@ -45,27 +49,23 @@ def score_nigiri(plate: Sequence[Card]) -> int:
 	num_wasabi = 0
 	score = 0
 
-	def score_with_wasabi(nigiri_score, num_wasabi):
-		if (num_wasabi > 0):
-			nigiri_score *= 3
-			num_wasabi -= 1
-		return nigiri_score, num_wasabi
+	wasabi = Card.Wasabi
 	
 	for card in plate:
-		card_score = 0
-		if card is Card.Wasabi:
+		if card is wasabi:
 			num_wasabi += 1
-		
-		elif card is Card.EggNigiri:
-			card_score, num_wasabi = score_with_wasabi(1, num_wasabi)
-		
-		elif card is Card.SalmonNigiri:
-			card_score, num_wasabi = score_with_wasabi(2, num_wasabi)
-		
-		elif card is Card.SquidNigiri:
-			card_score, num_wasabi = score_with_wasabi(3, num_wasabi)
-
-		score += card_score
+			continue
+
+		# Table lookup; None if not nigiri
+		nigiri_score = card.nigiri_base_points()
+		if nigiri_score is None:
+			continue
+
+		if num_wasabi:
+			nigiri_score *= 3
+			num_wasabi -= 1
+
+		score += nigiri_score
 
 	return score
 
@@ -256,65 +256,12 @@ def rank_players(players: Sequence[Union[PlayerState, ScoreAndPudding]], print_i
 
 	assert len(players) > 0
 
-	unscored_players = {idx: player for idx, player in enumerate(players)}
-	player_ranks = dict()
-
-	# curr_rank = 1
-
-	for rank in range(len(players)):
-
-		"""
-		With no ties, here's what we'll see at the start of each loop iteration:
-
-		rank=0: player_ranks={}
-		rank=1: player_ranks={<idx>: 0}
-		rank=2: player_ranks={<idx>: 0, <idx>: 1}
-		rank=3: player_ranks={<idx>: 0, <idx>: 1, <idx>: 2}
-
-		If there's a tie for 1st (rank 0), then:
-
-		rank=0: player_ranks={}
-		rank=1: player_ranks={<idx>: 0, <idx>: 0} - skip this iteration
-		rank=2: player_ranks={<idx>: 0, <idx>: 0}
-		rank=3: player_ranks={<idx>: 0, <idx>: 0, <idx>: 2}
-		"""
-		if len(player_ranks) > rank:
-			continue
-
-		assert unscored_players
-
-		max_score = max([p.total_score for p in unscored_players.values()])
-		players_at_max_score = {idx: p for idx, p in unscored_players.items() if p.total_score == max_score}
-		assert players_at_max_score
-
-		if len(players_at_max_score) == 1:
-			player_idx = next(iter(players_at_max_score))
-			unscored_players.pop(player_idx)
-			player_ranks[player_idx] = rank
-			continue
-
-		# Tiebreaker is max number of puddings
-
-		max_num_puddings_of_players_at_max_score = max([p.num_pudding for p in players_at_max_score.values()])
-		players_at_max_score_and_max_puddings = {
-			idx: p for idx, p in players_at_max_score.items()
-			if p.num_pudding == max_num_puddings_of_players_at_max_score
-		}
-
-		assert players_at_max_score_and_max_puddings
-
-		# No 2nd tiebreaker; all remaining tied players share this rank
-
-		for player_idx in players_at_max_score_and_max_puddings.keys():
-			unscored_players.pop(player_idx)
-			player_ranks[player_idx] = rank
-
-	assert not unscored_players, 'Failed to score all players'
-	assert sorted(list(player_ranks.keys())) == list(range(len(players))), 'Failed to score all players'
-
-	# Convert to list, and 1-index
-	player_ranks_list = [player_ranks[idx] + 1 for idx in range(len(players))]
-	assert min(player_ranks_list) == 1
+	# Rank by score, with number of puddings as tiebreaker; players still tied share a rank, and the following rank(s)
+	# are skipped, e.g. [1, 1, 3] ("standard competition ranking")
+	# i.e. rank is 1 + the number of players who did strictly better
+	# n is at most 5, so O(n^2) is fine and cheaper than sorting
+	keys = [(p.total_score, p.num_pudding) for p in players]
+	player_ranks_list = [1 + sum(other_key > key for other_key in keys) for key in keys]
 
 	if print_it:
 		print('Final results:')
@@ -374,4 +321,16 @@ def _test():
 	random.shuffle(plate)
 	ensure_score(plate, 41)
 
+	# Ranking, including pudding tiebreaker and shared ranks
+
+	def ensure_ranks(scores_and_puddings, expected_ranks):
+		ranks = rank_players([ScoreAndPudding(total_score=s, num_pudding=p) for s, p in scores_and_puddings])
+		assert ranks == expected_ranks, f'{scores_and_puddings=}, {expected_ranks=}, {ranks=}'
+
+	ensure_ranks([(10, 0)], [1])
+	ensure_ranks([(30, 0), (40, 0), (20, 0)], [2, 1, 3])
+	ensure_ranks([(40, 0), (40, 2), (40, 1)], [3, 1, 2])
+	ensure_ranks([(40, 1), (40, 1), (30, 5)], [1, 1, 3])
+	ensure_ranks([(20, 0), (40, 1), (40, 1), (40, 0), (20, 0)], [4, 1, 1, 3, 4])
+
 _test()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+from array import array
 from collections import Counter
 from collections.abc import Collection, Iterable, Sequence
 from copy import copy
@@ -7,7 +8,7 @@ import itertools
 import random
 from typing import Tuple, List, Optional, Set
 
-from cards import Card, Pick, Plate
+from cards import Card, Pick, Plate, get_pick
 
 
 FLOAT_EPSILON = 1e-6
@@ -43,6 +44,19 @@ def count_card(cards: Iterable[Card], card: Card) -> int:
 		return sum(c == card for c in cards)
 
 
+_EMPTY_CARD_HISTOGRAM = array('i', [0] * (max(Card) + 1))
+
+
+def card_histogram(cards: Iterable[Card]) -> array:
+	"""
+	Count of each card, as a flat array indexed by card value (cheaper than a Counter for this tiny fixed key range)
+	"""
+	counts = _EMPTY_CARD_HISTOGRAM[:]
+	for card in cards:
+		counts[card] += 1
+	return counts
+
+
 def count_maki(cards: Iterable[Card]) -> int:
 	return sum(card.num_maki() for card in cards)
 
@@ -86,14 +100,14 @@ def get_chopstick_picks(hand: Collection[Card], num_unused_wasabi: Optional[int]
 	if len(card_options) < 2:
 		if num_chopsticks_in_hand >= 2:
 			# Extremely rare case - but it's technically meaningful so we should still return it
-			return {Pick(Card.Chopsticks, Card.Chopsticks)}
+			return {get_pick(Card.Chopsticks, Card.Chopsticks)}
 		return set()
 
 	# Order only matters when nigiri + wasabi is involved (either a wasabi from before, or a new one)
 	# So take all combinations (not permuations), then manually add swapped-order pairs that matter after
 
 	if not prune_likely_bad_picks:
-		choices = {Pick(*choice) for choice in itertools.combinations(card_options, 2)}
+		choices = {get_pick(*choice) for choice in itertools.combinations(card_options, 2)}
 	else:
 		first_card_options = set(card_options)
 		_prune_likely_bad_picks(first_card_options)
@@ -104,7 +118,7 @@ def get_chopstick_picks(hand: Collection[Card], num_unused_wasabi: Optional[int]
 			second_card_choices = set(second_card_choices)
 			_prune_likely_bad_picks(second_card_choices)
 			for second_card in second_card_choices:
-				choices.add(Pick(*sorted((first_card, second_card))))
+				choices.add(get_pick(*sorted((first_card, second_card))))
 
 	swapped_choices = set()
 	if (num_unused_wasabi is None) or (num_unused_wasabi <= 1):
@@ -114,15 +128,15 @@ def get_chopstick_picks(hand: Collection[Card], num_unused_wasabi: Optional[int]
 			if (num_unused_wasabi is None) or (num_unused_wasabi == 1):
 				# If there's already 1 unused wasabi, then the order of 2 different nigiri matters
 				if card_a.is_nigiri() and card_b.is_nigiri() and card_a != card_b:
-					swapped_choices.add(Pick(card_b, card_a))
+					swapped_choices.add(get_pick(card_b, card_a))
 			if not num_unused_wasabi:
 				# If no wasabi, then the order we play wasabi & nigiri matters
 				if (card_a == Card.Wasabi and card_b.is_nigiri()) or (card_a.is_nigiri() and card_b == Card.Wasabi):
-					swapped_choices.add(Pick(card_b, card_a))
+					swapped_choices.add(get_pick(card_b, card_a))
 	choices |= swapped_choices
 
 	if num_chopsticks_in_hand >= 2:
-		choices.add(Pick(Card.Chopsticks, Card.Chopsticks))
+		choices.add(get_pick(Card.Chopsticks, Card.Chopsticks))
 
 	return choices
 
@@ -145,9 +159,9 @@ def get_all_picks(
 			if len(hand) <= 1 + plate.chopsticks and len(options) > 1:
 				options.discard(Card.Chopsticks)
 			_prune_likely_bad_picks(options)
-			options = {Pick(card) for card in options}
+			options = {get_pick(card) for card in options}
 	else:
-		options = {Pick(card) for card in hand}
+		options = {get_pick(card) for card in hand}
 
 	if can_use_chopsticks:
 		options |= get_chopstick_picks(